@@ -1,47 +1,37 @@
-import os
 import logging
-from dotenv import load_dotenv
-
-# === Flask Imports ===
-from flask import Flask
-from flask_cors import CORS
-from flask_socketio import SocketIO
+from contextlib import asynccontextmanager
 
 # === FastAPI Imports ===
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.wsgi import WSGIMiddleware
-
-# === Load .env ===
-load_dotenv()
-
-# ---------------------- FLASK SETUP ---------------------- #
-flask_app = Flask(__name__)
-CORS(flask_app, supports_credentials=True)
-flask_app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "defaultsecret")
-
-# Logging
-log = logging.getLogger('werkzeug')
-log.setLevel(logging.ERROR)
-
-# SocketIO
-socketio = SocketIO(flask_app, cors_allowed_origins="*", async_mode="threading")
-
-# Register Socket Events
-from routes.events import register_socket_events
-register_socket_events(socketio)
-
-# Register Blueprint from results.controller
-from results.controller import results_bp
-flask_app.register_blueprint(results_bp, url_prefix="/api")
+from config.settings import get_settings
+from db.cache import get_cache
+from db.supabase import get_supabase_client
+from utils.json_utils import FastJSONResponse
 
-# HTML Homepage for Flask
-@flask_app.route("/")
-def flask_index():
-    return "<h1>AI Recruiter Backend</h1><p>The results API is available at /api/results/&lt;candidate_id&gt;</p>"
+# === Load .env (once, shared by every module through get_settings) ===
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # ---------------------- FASTAPI SETUP ---------------------- #
-fastapi_app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create shared clients per worker at startup instead of at import time
+    try:
+        get_supabase_client()
+    except Exception as e:
+        # Keep serving; endpoints that need Supabase will report the error
+        logger.warning("Supabase client not initialised: %s", e)
+    get_cache()
+    if settings.enable_flask:
+        # Build the Flask app now so a missing module fails startup, not every /flask request
+        from flask_app import create_flask_app
+        create_flask_app()
+    yield
+
+
+# Encode responses with orjson (when installed) instead of the stdlib json module
+fastapi_app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
 
 fastapi_app.add_middleware(
     CORSMiddleware,
@@ -58,8 +48,11 @@ from routes.hr_routes import router as hr_router
 fastapi_app.include_router(test_router, prefix="/api/test")
 fastapi_app.include_router(hr_router, prefix="/api/hr")
 
-# Mount Flask inside FastAPI
-fastapi_app.mount("/flask", WSGIMiddleware(flask_app))
+# Mount Flask (results API + SocketIO) inside FastAPI when ENABLE_FLASK is set;
+# importing it is deferred to the lifespan so FastAPI-only workers never load Flask
+if settings.enable_flask:
+    from flask_app import LazyFlaskMount
+    fastapi_app.mount("/flask", LazyFlaskMount())
 
 # FastAPI Home
 @fastapi_app.get("/")
@@ -73,5 +66,4 @@ app = fastapi_app
 # For local development only
 if __name__ == "__main__":
     import uvicorn
-    port = int(os.environ.get("PORT", 5000))
-    uvicorn.run("app:app", host="0.0.0.0", port=port, reload=True)
+    uvicorn.run("app:app", host="0.0.0.0", port=settings.port, reload=True)
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of the per-request JSON work in /api/test/submit (the
+evaluation itself excluded): the old handler (FastAPI body parsing, the
+submission.dict() print, jsonable_encoder on the returned dict) against
+the current one (parse_body, a one-line summary, the stored submission
+copy and json_response).
+
+    python -m benchmarks.bench_json [num_questions] [answer_kb]
+"""
+import sys
+import json
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+
+from schemas.test_schemas import TestSubmission
+from utils import json_utils
+
+
+def build_payload(num_questions: int, answer_kb: int) -> bytes:
+    code = ("def solve(nums):\n    return sorted(set(nums))\n" * 64)[: answer_kb * 1024]
+    return json.dumps({
+        "question_set_id": str(uuid.uuid4()),
+        "questions": [
+            {"question": f"Implement solution #{i}", "options": None, "answer": code}
+            for i in range(num_questions)
+        ],
+        "answers": [code] * num_questions,
+        "languages": ["python"] * num_questions,
+        "duration_used": 1200,
+    }).encode("utf-8")
+
+
+def response_for(submission: TestSubmission) -> dict:
+    # Same shape submit_test returns; small compared to the request
+    return {
+        "score": 70,
+        "max_score": len(submission.questions) * 10,
+        "percentage": 35.0,
+        "status": "Fail",
+        "raw_feedback": "Q1 - Type: Coding - Score: 7/10\n" * len(submission.questions),
+        "result_id": str(uuid.uuid4()),
+        "database_error": None,
+        "duration_used": 20.0,
+    }
+
+
+def default_path(body: bytes) -> bytes:
+    # FastAPI body param: json.loads, then validation from the dict
+    submission = TestSubmission(**json.loads(body))
+    # print("📨 Received test submission:", submission.dict()) without the I/O
+    str(submission.dict())
+    # Returned dict goes through jsonable_encoder and JSONResponse (json.dumps)
+    content = jsonable_encoder(response_for(submission))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(body: bytes) -> bytes:
+    if hasattr(TestSubmission, "model_validate_json"):
+        submission = TestSubmission.model_validate_json(body)
+    else:
+        submission = TestSubmission.parse_raw(body)
+    # One-line summary print, without the I/O
+    _ = f"📨 Received test submission for {submission.question_set_id}: {len(submission.questions)} questions, {len(submission.answers)} answers"
+    # Stored with the result row for re-scoring
+    json_utils.model_to_jsonable(submission)
+    return json_utils.dumps(response_for(submission))
+
+
+def timeit(fn, body: bytes, rounds: int) -> float:
+    fn(body)
+    start = time.process_time()
+    for _ in range(rounds):
+        fn(body)
+    return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    num_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    answer_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    rounds = 200
+
+    body = build_payload(num_questions, answer_kb)
+    default_ms = timeit(default_path, body, rounds)
+    fast_ms = timeit(fast_path, body, rounds)
+
+    print(f"payload: {len(body) / 1024:.1f} KB ({num_questions} questions, {answer_kb} KB answers)")
+    print(f"orjson available: {json_utils.orjson is not None}")
+    print(f"default path: {default_ms:.3f} ms CPU/request")
+    print(f"fast path:    {fast_ms:.3f} ms CPU/request")
+    print(f"speedup:      {default_ms / fast_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Startup benchmark: time to `import app` in a fresh interpreter and latency
+of the first request through the ASGI app (lifespan included).
+
+    python -m benchmarks.bench_startup [runs]
+
+Exits non-zero when the median import time exceeds IMPORT_BUDGET_MS.
+"""
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", 1500))
+
+MEASURE = """
+import time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+with TestClient(app.app) as client:
+    ready = time.perf_counter()
+    client.get("/")
+    first = time.perf_counter()
+
+print((imported - start) * 1000, (ready - imported) * 1000, (first - ready) * 1000)
+"""
+
+
+def run_once() -> tuple:
+    # Fresh interpreter each run so nothing is already imported
+    out = subprocess.run(
+        [sys.executable, "-c", MEASURE],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return tuple(float(v) for v in out.stdout.strip().splitlines()[-1].split())
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    wall_start = time.perf_counter()
+    samples = [run_once() for _ in range(runs)]
+
+    import_ms = statistics.median(s[0] for s in samples)
+    lifespan_ms = statistics.median(s[1] for s in samples)
+    first_request_ms = statistics.median(s[2] for s in samples)
+
+    print(f"runs: {runs} ({time.perf_counter() - wall_start:.1f}s total)")
+    print(f"import app:     {import_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    print(f"lifespan start: {lifespan_ms:.1f} ms")
+    print(f"first request:  {first_request_ms:.1f} ms")
+
+    if import_ms > IMPORT_BUDGET_MS:
+        print("❌ import time over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    supabase_url: Optional[str]
+    supabase_service_role_key: Optional[str]
+    openrouter_api_key: Optional[str]
+    secret_key: str
+    port: int
+    enable_flask: bool
+    cache_backend: str
+    cache_path: Optional[str]
+    cache_max_entries: int
+    max_body_bytes: int
+    question_bank_scan_limit: int
+    question_bank_reuse_ratio: float
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Load .env once and return the application settings. Missing values are
+    left as None here and only reported by the code that needs them.
+    """
+    load_dotenv()
+    return Settings(
+        supabase_url=os.getenv("SUPABASE_URL"),
+        supabase_service_role_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
+        openrouter_api_key=os.getenv("OPENROUTER_API_KEY"),
+        secret_key=os.getenv("SECRET_KEY", "defaultsecret"),
+        port=int(os.getenv("PORT", 5000)),
+        # routes.events / results.controller aren't in this tree yet, so the Flask mount is opt-in
+        enable_flask=_env_bool("ENABLE_FLASK", False),
+        # "memory" is per worker: entries can't be invalidated across workers, so
+        # test payloads are only cached with the shared "sqlite" backend
+        cache_backend=os.getenv("CACHE_BACKEND", "sqlite").lower(),
+        cache_path=os.getenv("CACHE_PATH"),
+        cache_max_entries=int(os.getenv("CACHE_MAX_ENTRIES", 10000)),
+        max_body_bytes=int(os.getenv("MAX_BODY_BYTES", 2 * 1024 * 1024)),
+        question_bank_scan_limit=int(os.getenv("QUESTION_BANK_SCAN_LIMIT", 500)),
+        question_bank_reuse_ratio=float(os.getenv("QUESTION_BANK_REUSE_RATIO", 0.5)),
+    )
@@ -0,0 +1,326 @@
+import os
+import time
+import atexit
+import sqlite3
+import tempfile
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from config.settings import get_settings
+from utils.json_utils import dumps, loads
+
+
+def test_payload_key(question_set_id: str) -> str:
+    """Cached GET /api/test/{id} payload; cleared when HR deletes or extends the test"""
+    return f"test_payload:{question_set_id}"
+
+
+def _expires_at(ttl: Optional[float]) -> Optional[float]:
+    return time.time() + ttl if ttl is not None else None
+
+
+def _degrade(default):
+    """A broken cache (locked, disk full, unwritable path) acts as a miss/no-op instead of failing the request"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return fn(self, *args, **kwargs)
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache {fn.__name__} failed, continuing without cache: {e}")
+                return default
+        return wrapper
+    return decorator
+
+
+class CacheBackend:
+    """
+    Key/value store for cached payloads and small bits of shared state.
+    Values must be JSON serializable; `ttl` is in seconds (None = no expiry).
+    Callers get a copy, so mutating a returned value never changes the cache.
+    """
+
+    shared = False  # True when every worker on the host sees the same entries
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store only if the key is missing; returns True if this call stored it"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+    @staticmethod
+    def _stats(backend: str, hits: int, misses: int, entries: int) -> dict:
+        total = hits + misses
+        return {
+            "backend": backend,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "entries": entries,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache, private to the worker that created it"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        # Values are kept serialized so get/set copy exactly like the sqlite backend
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_entry(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            entry = None
+        return entry
+
+    def _set_locked(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        self._data[key] = (dumps(value), _expires_at(ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return loads(entry[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._get_entry(key) is not None:
+                return False
+            self._set_locked(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return self._stats("memory", self.hits, self.misses, len(self._data))
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache shared by every worker on the host through a SQLite file in WAL
+    mode. Entries and hit/miss counters live in the file, so they survive
+    worker restarts. SQLite errors degrade to a miss/no-op.
+    """
+
+    shared = True
+    PRUNE_EVERY = 200  # writes between expired/overflow cleanups (fewer for small caches)
+    STATS_FLUSH_EVERY = 100  # reads counted in memory before they are written to the file
+    STATS_FLUSH_SECONDS = 10
+    # Calls run on the event loop, so a locked file is treated as a miss quickly
+    # rather than stalling the worker; only setup waits longer
+    BUSY_TIMEOUT = 0.2
+    SETUP_BUSY_TIMEOUT = 5
+    ADD_BUSY_TIMEOUT = 2  # add() guards idempotency; callers run it off the event loop
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        # Keeps the table within ~10% of max_entries between cleanups
+        self._prune_every = max(1, min(self.PRUNE_EVERY, max_entries // 10))
+        self._pending = {"hits": 0, "misses": 0}
+        self._pending_lock = threading.Lock()
+        self._flushed_at = time.time()
+        # Counts still in memory when a worker is recycled would be lost otherwise
+        atexit.register(self._flush_stats)
+
+        conn = self._conn()
+        conn.execute(f"PRAGMA busy_timeout = {int(self.SETUP_BUSY_TIMEOUT * 1000)}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_stats ("
+            "name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.BUSY_TIMEOUT * 1000)}")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str) -> None:
+        # Counted in memory so reads don't take the file's write lock
+        with self._pending_lock:
+            self._pending[name] += 1
+            due = (
+                sum(self._pending.values()) >= self.STATS_FLUSH_EVERY
+                or time.time() - self._flushed_at >= self.STATS_FLUSH_SECONDS
+            )
+        if due:
+            self._flush_stats()
+
+    @_degrade(None)
+    def _flush_stats(self) -> None:
+        with self._pending_lock:
+            pending = [(name, count) for name, count in self._pending.items() if count]
+            self._pending = {"hits": 0, "misses": 0}
+            self._flushed_at = time.time()
+        if not pending:
+            return
+        try:
+            self._conn().executemany(
+                "INSERT INTO cache_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                pending,
+            )
+        except sqlite3.Error:
+            # Keep the counts for the next flush
+            with self._pending_lock:
+                for name, count in pending:
+                    self._pending[name] += count
+            raise
+
+    def _maybe_prune(self) -> None:
+        self._writes += 1
+        if self._writes % self._prune_every:
+            return
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE rowid IN ("
+            "SELECT rowid FROM cache ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    @_degrade(None)
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        self._count("hits" if row else "misses")
+        return loads(row[0]) if row else None
+
+    @_degrade(None)
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, dumps(value), _expires_at(ttl)),
+        )
+        self._maybe_prune()
+
+    @_degrade(True)  # Without a working cache nobody else can be holding the key
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        conn = self._conn()
+        conn.execute(f"PRAGMA busy_timeout = {int(self.ADD_BUSY_TIMEOUT * 1000)}")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {int(self.BUSY_TIMEOUT * 1000)}")
+        try:
+            conn.execute(
+                "DELETE FROM cache WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (key, time.time()),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, dumps(value), _expires_at(ttl)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    @_degrade(None)
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    @_degrade(None)
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM cache")
+        conn.execute("DELETE FROM cache_stats")
+        with self._pending_lock:
+            self._pending = {"hits": 0, "misses": 0}
+
+    @_degrade({"backend": "sqlite", "error": "cache unavailable"})
+    def stats(self) -> dict:
+        self._flush_stats()
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+        entries = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return self._stats("sqlite", counters.get("hits", 0), counters.get("misses", 0), entries)
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def create_cache(backend: str, path: Optional[str] = None, max_entries: int = 10000) -> CacheBackend:
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries)
+    if backend == "sqlite":
+        return SQLiteCache(path or os.path.join(tempfile.gettempdir(), "backend_cache.sqlite3"), max_entries=max_entries)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def get_cache() -> CacheBackend:
+    """
+    Returns the process-wide cache. CACHE_BACKEND picks the implementation:
+    "sqlite" (default, shared by all gunicorn workers on the host) or "memory".
+    Falls back to the in-process cache if the SQLite file can't be opened.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                try:
+                    _cache = create_cache(
+                        settings.cache_backend,
+                        path=settings.cache_path,
+                        max_entries=settings.cache_max_entries,
+                    )
+                except sqlite3.Error as e:
+                    print(f"⚠️ SQLite cache unavailable, falling back to in-process cache: {e}")
+                    _cache = MemoryCache(max_entries=settings.cache_max_entries)
+    return _cache
@@ -0,0 +1,6 @@
+-- Question bank (services/question_bank.py): difficulty of finalized questions.
+-- Stored lowercased by /api/hr/finalize-test; the column is only written once it exists.
+alter table questions add column if not exists difficulty text;
+
+create index if not exists questions_jd_id_difficulty_idx
+    on questions (jd_id, difficulty, created_at desc);
@@ -0,0 +1,37 @@
+-- Batch re-scoring (services/batch_evaluator.py, POST /api/hr/rescore).
+-- Until this is applied, /api/test/submit saves results without `submission`
+-- and /api/hr/rescore refuses to start.
+
+-- Validated submission kept with each result so it can be re-evaluated later
+alter table test_results add column if not exists submission jsonb;
+alter table test_results add column if not exists rescored_at timestamptz;
+
+-- Bulk UPDATE of re-scored rows in one statement. jsonb_populate_recordset
+-- uses the table's own row type, so ids and scores keep their column types.
+-- Only existing rows are updated: no inserts, so only UPDATE policies apply.
+create or replace function rescore_test_results(updates jsonb)
+returns integer
+language sql
+as $$
+    with updated as (
+        update test_results t
+        set score = u.score,
+            max_score = u.max_score,
+            percentage = u.percentage,
+            status = u.status,
+            raw_feedback = u.raw_feedback,
+            rescored_at = u.rescored_at
+        from jsonb_populate_recordset(null::test_results, updates) u
+        where t.id = u.id
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;
+
+-- Durable state and checkpoint of re-scoring jobs, shared by all workers
+create table if not exists rescore_jobs (
+    id uuid primary key,
+    status text not null,
+    state jsonb not null,
+    updated_at timestamptz not null default now()
+);
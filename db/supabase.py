@@ -1,15 +1,66 @@
-import os
-from supabase import create_client
-from dotenv import load_dotenv
+import time
+import threading
+from config.settings import get_settings
 
-load_dotenv()
+_client = None
+_client_lock = threading.Lock()
+
+# (table, column) -> (exists, checked_at); a missing column is re-checked after this many seconds
+COLUMN_RECHECK_SECONDS = 300
+_column_checks = {}
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-supabase = create_client(url, key)
 
 def get_supabase_client():
     """
-    Returns the Supabase client instance
+    Returns the Supabase client instance, creating it on first use
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Imported here so importing the app doesn't pay for the supabase SDK
+                from supabase import create_client
+
+                settings = get_settings()
+                if not settings.supabase_url or not settings.supabase_service_role_key:
+                    raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+                _client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+    return _client
+
+
+class _LazySupabase:
+    """Stands in for the client so `supabase.table(...)` call sites don't change"""
+
+    def __getattr__(self, name):
+        return getattr(get_supabase_client(), name)
+
+
+supabase = _LazySupabase()
+
+
+def _is_missing_column(error: Exception) -> bool:
+    # 42703: undefined_column from Postgres; PGRST204: column not in PostgREST's schema cache
+    code = getattr(error, "code", None)
+    return code in ("42703", "PGRST204") or "42703" in str(error) or "PGRST204" in str(error)
+
+
+def table_has_column(table: str, column: str) -> bool:
+    """
+    Whether `column` exists on `table`, so optional columns added by
+    db/migrations are only written once the migration has been applied.
+    Other errors (network, auth) are raised and not remembered.
     """
-    return supabase
\ No newline at end of file
+    checked = _column_checks.get((table, column))
+    if checked and (checked[0] or time.time() - checked[1] < COLUMN_RECHECK_SECONDS):
+        return checked[0]
+
+    try:
+        supabase.table(table).select(column).limit(1).execute()
+        exists = True
+    except Exception as e:
+        if not _is_missing_column(e):
+            raise
+        print(f"⚠️ Column {table}.{column} not available, skipping it (see db/migrations): {e}")
+        exists = False
+    _column_checks[(table, column)] = (exists, time.time())
+    return exists
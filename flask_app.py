@@ -0,0 +1,69 @@
+import logging
+import threading
+
+from config.settings import get_settings
+
+_flask_app = None
+_socketio = None
+_lock = threading.Lock()
+
+
+def create_flask_app():
+    """
+    Build the Flask app and SocketIO server (results API + socket events).
+    Built once, from the FastAPI lifespan when ENABLE_FLASK is set, so
+    FastAPI-only deployments never import Flask.
+    """
+    global _flask_app, _socketio
+    if _flask_app is not None:
+        return _flask_app, _socketio
+
+    with _lock:
+        if _flask_app is not None:
+            return _flask_app, _socketio
+
+        from flask import Flask
+        from flask_cors import CORS
+        from flask_socketio import SocketIO
+
+        flask_app = Flask(__name__)
+        CORS(flask_app, supports_credentials=True)
+        flask_app.config["SECRET_KEY"] = get_settings().secret_key
+
+        # Logging
+        log = logging.getLogger('werkzeug')
+        log.setLevel(logging.ERROR)
+
+        # SocketIO
+        socketio = SocketIO(flask_app, cors_allowed_origins="*", async_mode="threading")
+
+        # Register Socket Events
+        from routes.events import register_socket_events
+        register_socket_events(socketio)
+
+        # Register Blueprint from results.controller
+        from results.controller import results_bp
+        flask_app.register_blueprint(results_bp, url_prefix="/api")
+
+        # HTML Homepage for Flask
+        @flask_app.route("/")
+        def flask_index():
+            return "<h1>AI Recruiter Backend</h1><p>The results API is available at /api/results/&lt;candidate_id&gt;</p>"
+
+        _flask_app, _socketio = flask_app, socketio
+    return _flask_app, _socketio
+
+
+class LazyFlaskMount:
+    """ASGI app wrapping the Flask app (already built by the lifespan) in its WSGI bridge"""
+
+    def __init__(self):
+        self._asgi = None
+
+    async def __call__(self, scope, receive, send):
+        if self._asgi is None:
+            from starlette.middleware.wsgi import WSGIMiddleware
+
+            flask_app, _ = create_flask_app()
+            self._asgi = WSGIMiddleware(flask_app)
+        await self._asgi(scope, receive, send)
@@ -1,21 +1,26 @@
-from fastapi import APIRouter, HTTPException
-from schemas.test_schemas import TestRequest, TestFinalizeRequest
-from services.test_generator import generate_questions
-from db.supabase import supabase
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from schemas.test_schemas import TestRequest, TestFinalizeRequest, RescoreRequest
+from services.question_bank import assemble_questions, normalize_difficulty
+from services.batch_evaluator import start_job, run_job, get_job, job_progress
+from db.supabase import supabase, table_has_column
+from db.cache import get_cache, test_payload_key
+from utils.question_utils import question_fingerprint
+from utils.json_utils import parse_body, json_response, request_body_schema
 from uuid import uuid4
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
 @router.post("/generate-test")
 async def create_test(request: TestRequest):
-    # Generate questions using LLM
-    questions = await generate_questions(request)
-    return {"questions": questions}
+    # Reuse finalized questions for this JD first, generate only the shortfall with the LLM
+    questions, reused_count = await assemble_questions(request)
+    return {"questions": questions, "reused_count": reused_count}
 
-@router.post("/finalize-test")
-async def finalize_test(request: TestFinalizeRequest):
+@router.post("/finalize-test", openapi_extra=request_body_schema(TestFinalizeRequest))
+async def finalize_test(http_request: Request):
+    request = await parse_body(http_request, TestFinalizeRequest)
     question_set_id = str(uuid4())
     created_at = datetime.utcnow()
     expires_at = created_at + timedelta(hours=2)
@@ -29,9 +34,20 @@ async def finalize_test(request: TestFinalizeRequest):
         "duration": request.duration  # Add duration field
     }).execute()
 
-    # Insert questions linked to this set
+    # difficulty needs db/migrations/001_questions_difficulty.sql; skip it until applied
+    difficulty = normalize_difficulty(request.difficulty)
+    if difficulty and not table_has_column("questions", "difficulty"):
+        difficulty = None
+
+    # Insert questions linked to this set, skipping duplicates by normalised text
+    seen = set()
     for q in request.questions:
-        supabase.table("questions").insert({
+        fingerprint = question_fingerprint(q.question)
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+
+        row = {
             "question_set_id": question_set_id,
             "jd_id": request.jd_id,
             "question": q.question,        # ✅ Access attributes
@@ -39,16 +55,19 @@ async def finalize_test(request: TestFinalizeRequest):
             "answer": q.answer,            # ✅ Optional
             "created_at": created_at.isoformat(),
             "expires_at": expires_at.isoformat()
-        }).execute()
+        }
+        if difficulty:
+            row["difficulty"] = difficulty
+        supabase.table("questions").insert(row).execute()
 
     test_link = f"http://localhost:5173/test/{question_set_id}"
-    return {
+    return json_response(http_request, {
         "test_link": test_link,
         "test_id": question_set_id,
         "jd_id": request.jd_id,
         "duration": request.duration,
         "message": "Test finalized successfully"
-    }
+    })
 
 @router.get("/tests")
 async def get_all_tests():
@@ -143,6 +162,7 @@ async def delete_test(test_id: str):
         
         # Delete question set
         result = supabase.table("question_sets").delete().eq("id", test_id).execute()
+        get_cache().delete(test_payload_key(test_id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Test not found")
@@ -165,6 +185,7 @@ async def extend_test_expiry(test_id: str, hours: int = 24):
         result = supabase.table("question_sets").update({
             "expires_at": new_expires_at.isoformat()
         }).eq("id", test_id).execute()
+        get_cache().delete(test_payload_key(test_id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Test not found")
@@ -180,20 +201,91 @@ async def extend_test_expiry(test_id: str, hours: int = 24):
         raise HTTPException(status_code=500, detail=f"Failed to extend test expiry: {str(e)}")
 
 
+# difficulty is added by db/migrations/001_questions_difficulty.sql
+QUESTION_COLUMNS = ["id", "question_set_id", "jd_id", "question", "options", "answer", "difficulty", "created_at", "expires_at"]
+
+
 @router.get("/questions/{jd_id}")
-async def get_questions_by_jd(jd_id: str):
+async def get_questions_by_jd(
+    jd_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return (default: all)"),
+):
+    """Get a page of questions for a JD, optionally projecting only the requested columns"""
+    columns = ["*"]
+    if fields:
+        columns = [c.strip() for c in fields.split(",") if c.strip()]
+        unknown = [c for c in columns if c not in QUESTION_COLUMNS]
+        if "difficulty" in columns and not table_has_column("questions", "difficulty"):
+            unknown.append("difficulty")
+        if unknown or not columns:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
     try:
-        # ✅ Fetch questions from Supabase by jd_id
-        response = supabase.table("questions").select("*").eq("jd_id", jd_id).execute()
- 
-        if not response.data:
-            raise HTTPException(status_code=404, detail="No questions found for this jd_id")
- 
-        return {
-            "jd_id": jd_id,
-            "total_questions": len(response.data),
-            "questions": response.data
-        }
- 
+        # ✅ Fetch one page of questions from Supabase by jd_id
+        response = (
+            supabase.table("questions")
+            .select(", ".join(columns), count="exact")
+            .eq("jd_id", jd_id)
+            .order("created_at")
+            .order("id")  # rows of one question set share created_at; id keeps pages stable
+            .range(offset, offset + limit - 1)
+            .execute()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    total = response.count or 0
+    if not response.data and offset == 0:
+        raise HTTPException(status_code=404, detail="No questions found for this jd_id")
+
+    return {
+        "jd_id": jd_id,
+        "total_questions": total,
+        "limit": limit,
+        "offset": offset,
+        "has_more": offset + len(response.data) < total,
+        "questions": response.data
+    }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters of the shared cache (aggregated across workers for the sqlite backend)"""
+    return get_cache().stats()
+
+
+@router.post("/rescore", status_code=202)
+async def rescore_results(request: RescoreRequest, background_tasks: BackgroundTasks):
+    """Re-evaluate stored submissions of a test (or given result ids) and write the new scores back"""
+    if not (request.job_id or request.test_id or request.result_ids):
+        raise HTTPException(status_code=400, detail="Provide test_id, result_ids or job_id to resume")
+
+    try:
+        job = start_job(request)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        print(f"❌ Error starting rescore job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to start rescore job: {str(e)}")
+
+    background_tasks.add_task(run_job, job["job_id"], request.concurrency, request.batch_size)
+    return job_progress(job)
+
+
+@router.get("/rescore/{job_id}")
+async def get_rescore_progress(job_id: str):
+    """Progress and throughput of a rescore job"""
+    try:
+        job = get_job(job_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        print(f"❌ Error fetching rescore job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch rescore job: {str(e)}")
+    if not job:
+        raise HTTPException(status_code=404, detail="Rescore job not found")
+    return job_progress(job)
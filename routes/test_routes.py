@@ -1,16 +1,31 @@
 # backend/routes/test_routes.py
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
 from datetime import datetime, timezone
-from db.supabase import supabase
+from db.supabase import supabase, table_has_column
+from db.cache import get_cache, test_payload_key
 from schemas.test_schemas import TestSubmission
 from services.test_evaluator import evaluate_test
+from utils.json_utils import parse_body, json_response, request_body_schema, model_to_jsonable
 
 router = APIRouter()
 
+TEST_PAYLOAD_TTL = 300  # seconds a fetched test is served from the cache
+IDEMPOTENCY_TTL = 24 * 60 * 60
+IDEMPOTENCY_PENDING_TTL = 10 * 60  # frees the key if a worker dies mid-evaluation
+
 
 @router.get("/{question_set_id}")
-async def fetch_test(question_set_id: str):
+async def fetch_test(question_set_id: str, request: Request):
+    # Only cached on a shared backend: delete/extend can't invalidate other workers' memory caches
+    cache = get_cache()
+    cached = cache.get(test_payload_key(question_set_id)) if cache.shared else None
+    if cached:
+        if datetime.now(timezone.utc) > datetime.fromisoformat(cached["expires_at"]):
+            raise HTTPException(status_code=410, detail="Test expired")
+        return json_response(request, cached["payload"])
+
     res = supabase.table("question_sets").select("*").eq("id", question_set_id).execute()
     print("📄 Supabase question_set response:", res)
 
@@ -32,17 +47,53 @@ async def fetch_test(question_set_id: str):
     if not q_res.data:
         raise HTTPException(status_code=404, detail="No questions found")
 
-    return {
+    payload = {
         "questions": q_res.data,
         "duration": duration,  # Include duration in response
         "test_id": question_set_id
     }
+    # Shared across workers, so a link opened by many candidates hits Supabase once
+    if cache.shared:
+        cache.set(test_payload_key(question_set_id), {"payload": payload, "expires_at": expires_at}, ttl=TEST_PAYLOAD_TTL)
+    return json_response(request, payload)
+
+
+@router.post("/submit", openapi_extra=request_body_schema(TestSubmission))
+async def submit_test(request: Request):
+    # Parse raw bytes straight into the model (size-limited) instead of the default body path
+    submission = await parse_body(request, TestSubmission)
+    print(f"📨 Received test submission for {submission.question_set_id}: {len(submission.questions)} questions, {len(submission.answers)} answers")
+
+    # Claim the Idempotency-Key before evaluating, so a retry that arrives while the
+    # first request is still being scored can't evaluate and insert a second time
+    idempotency_key = request.headers.get("idempotency-key")
+    cache = get_cache()
+    claim_key = f"idempotency:submit:{idempotency_key}" if idempotency_key else None
+    # add() may wait on the shared file's write lock, so keep it off the event loop
+    if claim_key and not await asyncio.to_thread(cache.add, claim_key, {"state": "pending"}, ttl=IDEMPOTENCY_PENDING_TTL):
+        stored = cache.get(claim_key)
+        if stored and stored.get("state") == "done":
+            print("♻️ Returning stored response for idempotency key", idempotency_key)
+            return json_response(request, stored["response"])
+        raise HTTPException(status_code=409, detail="A submission with this Idempotency-Key is still being processed")
 
-
-@router.post("/submit")
-async def submit_test(submission: TestSubmission):
-    print("📨 Received test submission:", submission.dict())
-
+    try:
+        response = await evaluate_and_save(submission)
+    except BaseException:
+        if claim_key:
+            cache.delete(claim_key)
+        raise
+
+    if claim_key:
+        if response["database_error"]:
+            # Not saved, let the client retry with the same key
+            cache.delete(claim_key)
+        else:
+            cache.set(claim_key, {"state": "done", "response": response}, ttl=IDEMPOTENCY_TTL)
+    return json_response(request, response)
+
+
+async def evaluate_and_save(submission: TestSubmission) -> dict:
     # Evaluate the test
     result = await evaluate_test(submission)
     print("✅ Evaluation result:", result)
@@ -66,6 +117,9 @@ async def submit_test(submission: TestSubmission):
             "duration_used_seconds": submission.duration_used,
             "duration_used_minutes": duration_used_minutes
         }
+        # Kept so the result can be re-scored later; needs db/migrations/002_test_results_rescore.sql
+        if table_has_column("test_results", "submission"):
+            insert_data["submission"] = model_to_jsonable(submission)
         
         # Insert into database
         db_result = supabase.table("test_results").insert(insert_data).execute()
@@ -91,4 +145,4 @@ async def submit_test(submission: TestSubmission):
         "result_id": result.get("result_id"),
         "database_error": result.get("database_error"),
         "duration_used": duration_used_minutes
-    }
\ No newline at end of file
+    }
@@ -33,7 +33,7 @@
 #     message: str
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
  
@@ -56,6 +56,7 @@ class TestFinalizeRequest(BaseModel):
     questions: List[Question]  # Expect list of question dicts
     duration: Optional[int] = 20  # Duration in minutes, default 20
     jd_id: str  # ✅ Required so we can link questions to a JD
+    difficulty: Optional[str] = None  # Stored so the question bank can reuse these questions
  
 class TestSubmission(BaseModel):
     question_set_id: UUID  # UUID, not str
@@ -68,4 +69,11 @@ class TestResponse(BaseModel):
     test_link: str
     test_id: str
     duration: int
-    message: str
\ No newline at end of file
+    message: str
+ 
+class RescoreRequest(BaseModel):
+    test_id: Optional[str] = None  # Re-score every submission of this test...
+    result_ids: Optional[List[str]] = None  # ...or just these test_results rows
+    job_id: Optional[str] = None  # Resume an interrupted job from its checkpoint
+    concurrency: int = Field(8, ge=1, le=32)  # Evaluations running at once
+    batch_size: int = Field(50, ge=1, le=500)  # Rows fetched and written back per batch
@@ -0,0 +1,286 @@
+import time
+import asyncio
+from uuid import uuid4
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from db.supabase import supabase, table_has_column
+from schemas.test_schemas import RescoreRequest, TestSubmission
+from services.test_evaluator import evaluate_test
+
+STALE_AFTER = 5 * 60  # a "running" job with no checkpoint for this long can be resumed
+RESULT_COLUMNS = "id, question_set_id, submission"
+ID_CHUNK = 200  # ids per in_() filter, keeps the request URL short
+MIGRATION = "db/migrations/002_test_results_rescore.sql"  # submission column, bulk update, rescore_jobs
+
+# Statuses evaluate_test returns instead of raising; those rows keep their old score
+EVALUATION_ERRORS = {"Evaluation failed", "Network error", "Internal error"}
+
+# Set to False once PostgREST reports the bulk-update function missing
+_bulk_update_available = True
+
+
+def _get_job_row(job_id: str) -> Optional[dict]:
+    result = supabase.table("rescore_jobs").select("state, updated_at").eq("id", job_id).execute()
+    return result.data[0] if result.data else None
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    row = _get_job_row(job_id)
+    return row["state"] if row else None
+
+
+def _job_record(job: dict) -> dict:
+    job["updated_at"] = time.time()
+    return {
+        "status": job["status"],
+        "state": job,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _save_job(job: dict) -> None:
+    # Kept in the rescore_jobs table so every worker sees it and it survives restarts
+    supabase.table("rescore_jobs").upsert({"id": job["job_id"], **_job_record(job)}).execute()
+
+
+def _claim_job(job: dict, seen_updated_at: str) -> bool:
+    """
+    Conditional update: only succeeds if nobody saved the job since it was
+    read, so of two concurrent resumes exactly one gets to run it.
+    """
+    result = (
+        supabase.table("rescore_jobs")
+        .update(_job_record(job))
+        .eq("id", job["job_id"])
+        .eq("updated_at", seen_updated_at)
+        .execute()
+    )
+    return bool(result.data)
+
+
+def job_progress(job: dict) -> dict:
+    """Job state for API responses (without the requested id list)"""
+    view = {k: v for k, v in job.items() if k != "result_ids"}
+    processed = job["processed"]
+    view["percent"] = round(processed / job["total"] * 100, 1) if job["total"] else 100.0
+    remaining = job["total"] - processed
+    rate = job.get("rows_per_second") or 0
+    view["eta_seconds"] = round(remaining / rate, 1) if rate and remaining > 0 else None
+    return view
+
+
+def _existing_result_ids(result_ids: List[str]) -> List[str]:
+    """Requested ids without duplicates or ids that have no test_results row, sorted"""
+    ids = list(dict.fromkeys(result_ids))
+    found = []
+    for i in range(0, len(ids), ID_CHUNK):
+        rows = supabase.table("test_results").select("id").in_("id", ids[i:i + ID_CHUNK]).execute().data or []
+        found.extend(row["id"] for row in rows)
+    return sorted(found)
+
+
+def _count_test_results(test_id: str) -> int:
+    result = supabase.table("test_results").select("id", count="exact").eq("question_set_id", test_id).execute()
+    return result.count or 0
+
+
+def start_job(request: RescoreRequest) -> dict:
+    """
+    Create a re-scoring job, or claim an existing one for resuming.
+    Raises LookupError for an unknown job_id, ValueError if it is still
+    running (or another request resumed it first) and RuntimeError if the
+    rescore migration is not applied.
+    """
+    if not table_has_column("test_results", "submission"):
+        raise RuntimeError(f"test_results.submission is missing, apply {MIGRATION}")
+
+    if request.job_id:
+        row = _get_job_row(request.job_id)
+        if not row:
+            raise LookupError(f"Rescore job {request.job_id} not found")
+        job = row["state"]
+        if job["status"] == "running" and time.time() - job["updated_at"] < STALE_AFTER:
+            raise ValueError(f"Rescore job {request.job_id} is still running")
+        # Rows that failed last time are retried first and count as unprocessed again
+        job["processed"] -= len(job["failed_ids"])
+        job["retry_ids"] = job["retry_ids"] + job["failed_ids"]
+        job.update(status="queued", failed=0, failed_ids=[], error=None, finished_at=None)
+        if not _claim_job(job, row["updated_at"]):
+            raise ValueError(f"Rescore job {request.job_id} was just resumed by another request")
+        return job
+
+    result_ids = _existing_result_ids(request.result_ids) if request.result_ids else None
+    job = {
+        "job_id": str(uuid4()),
+        "test_id": None if result_ids is not None else request.test_id,
+        "result_ids": result_ids,
+        "status": "queued",
+        "total": len(result_ids) if result_ids is not None else _count_test_results(request.test_id),
+        "processed": 0,
+        "cursor": None,  # last id of the last finished batch; resume continues after it
+        "retry_ids": [],
+        "failed_ids": [],
+        "updated": 0,
+        "failed": 0,
+        "skipped": 0,
+        "rows_per_second": None,
+        "error": None,
+        "created_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+    }
+    _save_job(job)
+    return job
+
+
+def iter_result_batches(job: dict, batch_size: int) -> Iterator[Tuple[List[dict], dict]]:
+    """
+    Stream stored submissions page by page, projecting only what re-scoring
+    needs. Yields (rows, checkpoint): the job fields to store once the batch
+    is done. Rows to retry come first, then ids after the job's cursor in
+    id order, so a resumed job neither rescans nor skips rows.
+    """
+    retry_ids = list(job["retry_ids"])
+    for i in range(0, len(retry_ids), batch_size):
+        chunk = retry_ids[i:i + batch_size]
+        rows = supabase.table("test_results").select(RESULT_COLUMNS).in_("id", chunk).execute().data or []
+        yield rows, {"retry_ids": retry_ids[i + batch_size:]}
+
+    cursor = job["cursor"]
+    if job["result_ids"] is not None:
+        ids = [i for i in job["result_ids"] if cursor is None or i > cursor]
+        for i in range(0, len(ids), batch_size):
+            chunk = ids[i:i + batch_size]
+            rows = supabase.table("test_results").select(RESULT_COLUMNS).in_("id", chunk).execute().data or []
+            yield rows, {"cursor": chunk[-1]}
+        return
+
+    while True:
+        # Keyset paging: rows inserted while the job runs can't shift later pages
+        query = supabase.table("test_results").select(RESULT_COLUMNS).eq("question_set_id", job["test_id"])
+        if cursor is not None:
+            query = query.gt("id", cursor)
+        rows = query.order("id").limit(batch_size).execute().data or []
+        if not rows:
+            return
+        cursor = rows[-1]["id"]
+        yield rows, {"cursor": cursor}
+        if len(rows) < batch_size:
+            return
+
+
+def _write_scores(updates: List[dict]) -> None:
+    """
+    One bulk UPDATE through the rescore_test_results function; per-row
+    updates if it isn't installed. Never inserts, unlike an upsert.
+    """
+    global _bulk_update_available
+    if _bulk_update_available:
+        try:
+            supabase.rpc("rescore_test_results", {"updates": updates}).execute()
+            return
+        except Exception as e:
+            # PGRST202: function not found in the schema cache. Anything else fails the batch
+            if "PGRST202" not in str(e) and "rescore_test_results" not in str(e):
+                raise
+            print(f"⚠️ rescore_test_results unavailable ({e}), updating rows one by one")
+            _bulk_update_available = False
+
+    for update in updates:
+        fields = {k: v for k, v in update.items() if k != "id"}
+        supabase.table("test_results").update(fields).eq("id", update["id"]).execute()
+
+
+def _parse_submission(data: dict) -> TestSubmission:
+    if hasattr(TestSubmission, "model_validate"):
+        return TestSubmission.model_validate(data)
+    return TestSubmission.parse_obj(data)
+
+
+async def run_job(job_id: str, concurrency: int = 8, batch_size: int = 50) -> None:
+    """
+    Re-evaluate every submission of the job with up to `concurrency`
+    evaluations in flight, write each batch's new scores in one bulk UPDATE
+    and checkpoint the job's cursor in rescore_jobs after every batch.
+    """
+    try:
+        job = await asyncio.to_thread(get_job, job_id)
+    except Exception as e:
+        job = None
+        print(f"❌ Could not load rescore job {job_id}: {e}")
+    if not job:
+        print(f"❌ Rescore job {job_id} not found, nothing to run")
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    run_started = time.time()
+    run_rows = 0
+
+    job["status"] = "running"
+    await asyncio.to_thread(_save_job, job)
+
+    async def rescore(row: dict):
+        async with semaphore:
+            return await evaluate_test(_parse_submission(row["submission"]))
+
+    try:
+        batches = iter_result_batches(job, batch_size)
+        while True:
+            # Supabase calls are blocking, keep them off the event loop
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            rows, checkpoint = batch
+
+            pending = [row for row in rows if row.get("submission")]
+            # Submitted before answers were stored; nothing to re-score
+            skipped = len(rows) - len(pending)
+
+            outcomes = await asyncio.gather(*(rescore(row) for row in pending), return_exceptions=True)
+
+            rescored_at = datetime.utcnow().isoformat()
+            updates, failed_ids = [], []
+            for row, result in zip(pending, outcomes):
+                if isinstance(result, Exception) or result.get("status") in EVALUATION_ERRORS:
+                    print(f"⚠️ Rescore failed for result {row['id']}: {result if isinstance(result, Exception) else result.get('raw_feedback')}")
+                    failed_ids.append(row["id"])
+                    continue
+                updates.append({
+                    "id": row["id"],
+                    "score": result.get("score", 0),
+                    "max_score": result.get("max_score", len(row["submission"].get("questions", [])) * 10),
+                    "percentage": result.get("percentage", 0.0),
+                    "status": result.get("status", "Fail"),
+                    "raw_feedback": result.get("raw_feedback", ""),
+                    "rescored_at": rescored_at,
+                })
+
+            if updates:
+                await asyncio.to_thread(_write_scores, updates)
+                run_rows += len(updates)
+
+            # Checkpoint: a resumed job continues after this batch and retries its failed rows.
+            # Counted only now, so a batch that raised above is redone without double counting
+            job.update(checkpoint)
+            job["processed"] += len(rows)
+            job["updated"] += len(updates)
+            job["skipped"] += skipped
+            job["failed"] += len(failed_ids)
+            job["failed_ids"].extend(failed_ids)
+            job["rows_per_second"] = round(run_rows / max(time.time() - run_started, 1e-6), 2)
+            await asyncio.to_thread(_save_job, job)
+            print(f"🔁 Rescore {job_id}: {job['processed']}/{job['total']} processed, {job['failed']} failed, {job['rows_per_second']} rows/s")
+
+        job["status"] = "completed" if not job["failed"] else "completed_with_errors"
+
+    except Exception as e:
+        print(f"❌ Rescore job {job_id} stopped: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+
+    finally:
+        job["finished_at"] = datetime.utcnow().isoformat()
+        try:
+            await asyncio.to_thread(_save_job, job)
+        except Exception as e:
+            print(f"❌ Could not save final state of rescore job {job_id}: {e}")
@@ -0,0 +1,173 @@
+import random
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import get_settings
+from db.supabase import supabase, table_has_column
+from schemas.test_schemas import TestRequest
+from services.test_generator import generate_questions
+from utils.question_utils import normalize_question_text, question_fingerprint
+
+# Only the columns the bank needs - avoids pulling full rows for every question of a JD
+BANK_COLUMNS = "question, options, answer"
+
+def normalize_difficulty(difficulty: Optional[str]) -> Optional[str]:
+    """Difficulty as stored on `questions` (lowercased on write so reads can use eq)"""
+    return difficulty.strip().lower() if difficulty else None
+
+
+def question_kind(question: dict) -> str:
+    """MCQs carry options, coding questions don't (same rule the evaluator uses)"""
+    return "mcq" if question.get("options") else "coding"
+
+
+def requested_mix(request: TestRequest) -> Dict[str, int]:
+    """How many questions of each kind the request asks for"""
+    if request.question_type == "coding":
+        return {"coding": request.num_questions}
+    if request.question_type == "mixed":
+        mcq_count = request.mcq_count or 0
+        coding_count = request.coding_count or 0
+        if not mcq_count and not coding_count:
+            mcq_count = request.num_questions // 2
+            coding_count = request.num_questions - mcq_count
+        return {"mcq": mcq_count, "coding": coding_count}
+    return {"mcq": request.num_questions}
+
+
+class QuestionBank:
+    """
+    Known questions for one (jd_id, difficulty), indexed by kind and
+    deduplicated by the fingerprint of their normalised text.
+    """
+
+    def __init__(self, jd_id: str, difficulty: Optional[str]):
+        self.jd_id = jd_id
+        self.difficulty = normalize_difficulty(difficulty)
+        self._index: Dict[str, "OrderedDict[str, dict]"] = {}
+        self._seen = set()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, question_text: str) -> bool:
+        return question_fingerprint(question_text) in self._seen
+
+    def add(self, question: dict) -> bool:
+        """Add a question, returns False if it is a duplicate or has no text"""
+        text = question.get("question")
+        if not text:
+            return False
+        fingerprint = question_fingerprint(text)
+        if fingerprint in self._seen:
+            return False
+        self._seen.add(fingerprint)
+        self._index.setdefault(question_kind(question), OrderedDict())[fingerprint] = {
+            "question": text,
+            "options": question.get("options"),
+            "answer": question.get("answer"),
+        }
+        return True
+
+    def add_many(self, questions: Iterable[dict]) -> int:
+        return sum(1 for q in questions if self.add(q))
+
+    def take(self, kind: str, count: int) -> List[dict]:
+        """Random sample of up to `count` stored questions of this kind"""
+        bucket = list(self._index.get(kind, {}).values())
+        if count <= 0 or not bucket:
+            return []
+        return [dict(q) for q in random.sample(bucket, min(count, len(bucket)))]
+
+
+def load_question_bank(jd_id: str, difficulty: Optional[str]) -> QuestionBank:
+    """
+    Build a bank from the most recent finalized questions for a JD at this
+    difficulty. Filtering and the row limit happen in the query.
+    """
+    bank = QuestionBank(jd_id, difficulty)
+    # Until db/migrations/001_questions_difficulty.sql is applied nothing can match
+    if not bank.difficulty or not table_has_column("questions", "difficulty"):
+        return bank
+
+    response = (
+        supabase.table("questions")
+        .select(BANK_COLUMNS)
+        .eq("jd_id", jd_id)
+        .eq("difficulty", bank.difficulty)
+        .order("created_at", desc=True)
+        .limit(get_settings().question_bank_scan_limit)
+        .execute()
+    )
+    bank.add_many(response.data or [])
+    return bank
+
+
+def _as_question_list(result: Any) -> List[dict]:
+    """Models sometimes wrap the array (`{"questions": [...]}`) or return a single object"""
+    if isinstance(result, list):
+        return [q for q in result if isinstance(q, dict) and q.get("question")]
+    if isinstance(result, dict):
+        if result.get("question"):
+            return [result]
+        for value in result.values():
+            if isinstance(value, list):
+                return _as_question_list(value)
+    return []
+
+
+async def assemble_questions(request: TestRequest) -> Tuple[List[dict], int]:
+    """
+    Fill part of the requested mix from the question bank and call the
+    model for the rest. At most QUESTION_BANK_REUSE_RATIO of each kind is
+    reused, sampled at random, so tests for the same JD keep differing.
+    Returns (questions, reused_count).
+    """
+    if not request.jd_id:
+        return _as_question_list(await generate_questions(request)), 0
+
+    try:
+        bank = load_question_bank(request.jd_id, request.difficulty)
+    except Exception as e:
+        print(f"⚠️ Question bank unavailable, generating everything: {e}")
+        return _as_question_list(await generate_questions(request)), 0
+
+    mix = requested_mix(request)
+    reuse_ratio = get_settings().question_bank_reuse_ratio
+    picked = {
+        kind: bank.take(kind, int(count * reuse_ratio))
+        for kind, count in mix.items()
+    }
+    reused = sum(len(qs) for qs in picked.values())
+    shortfall = {kind: mix[kind] - len(picked[kind]) for kind in mix}
+    shortfall = {kind: count for kind, count in shortfall.items() if count > 0}
+    print(f"🏦 Question bank: reused {reused}, shortfall {shortfall}")
+
+    questions = [q for qs in picked.values() for q in qs]
+    if not shortfall:
+        return questions, reused
+
+    if len(shortfall) == 2:
+        update = {
+            "question_type": "mixed",
+            "num_questions": sum(shortfall.values()),
+            "mcq_count": shortfall["mcq"],
+            "coding_count": shortfall["coding"],
+        }
+    else:
+        kind, count = next(iter(shortfall.items()))
+        update = {"question_type": kind, "num_questions": count}
+
+    generated = _as_question_list(await generate_questions(request.copy(update=update)))
+
+    # Keep only what the shortfall asked for, dropping repeats of picked questions
+    seen = {question_fingerprint(q["question"]) for q in questions}
+    for q in generated:
+        kind = question_kind(q)
+        fingerprint = question_fingerprint(q["question"])
+        if shortfall.get(kind, 0) > 0 and fingerprint not in seen:
+            seen.add(fingerprint)
+            shortfall[kind] -= 1
+            questions.append(q)
+
+    return questions, reused
@@ -1,10 +1,7 @@
-import os
 import httpx
 import re
+from config.settings import get_settings
 from schemas.test_schemas import TestSubmission
-from dotenv import load_dotenv
-
-load_dotenv()
 
 async def evaluate_test(submission: TestSubmission):
     # Enhanced prompt with clearer instructions
@@ -55,7 +52,7 @@ async def evaluate_test(submission: TestSubmission):
         prompt += "---\n"
 
     headers = {
-        "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
+        "Authorization": f"Bearer {get_settings().openrouter_api_key}",
         "HTTP-Referer": "https://your-actual-domain.com",
         "X-Title": "Test Evaluation",
         "Content-Type": "application/json"
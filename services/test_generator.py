@@ -1,18 +1,16 @@
-import os
 import json
 import httpx
-from dotenv import load_dotenv
+from config.settings import get_settings
 from schemas.test_schemas import TestRequest
+from db.cache import get_cache
 
-load_dotenv()
-
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 JOB_SUMMARY_API_URL = "http://localhost:5000/api/jd/get-jd-summary/68870990e214ee4cab4957db"
+JOB_SUMMARY_TTL = 60 * 60  # seconds
 
 async def call_model(model_name: str, prompt: str):
     url = "https://openrouter.ai/api/v1/chat/completions"
     headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",  # Required for OpenRouter
+        "Authorization": f"Bearer {get_settings().openrouter_api_key}",  # Required for OpenRouter
         "Content-Type": "application/json",
     }
 
@@ -41,6 +39,11 @@ async def call_model(model_name: str, prompt: str):
         return None
 
 async def fetch_job_summary():
+    cache = get_cache()
+    cached = cache.get(f"job_summary:{JOB_SUMMARY_API_URL}")
+    if cached:
+        return cached
+
     try:
         async with httpx.AsyncClient() as client:
             headers = {
@@ -50,7 +53,10 @@ async def fetch_job_summary():
             print(f"🔵 Job Summary API | Status:", response.status_code)
             response.raise_for_status()
             data = response.json()
-            return data.get("jobSummary")
+            job_summary = data.get("jobSummary")
+            if job_summary:
+                cache.set(f"job_summary:{JOB_SUMMARY_API_URL}", job_summary, ttl=JOB_SUMMARY_TTL)
+            return job_summary
     except Exception as e:
         print(f"❌ Job Summary API failed:", e)
         return None
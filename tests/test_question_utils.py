@@ -0,0 +1,19 @@
+from utils.question_utils import normalize_question_text, question_fingerprint
+
+
+def test_trivial_edits_share_a_fingerprint():
+    assert question_fingerprint("What is Python?") == question_fingerprint("  what is   python ")
+    assert question_fingerprint("Explain REST.") == question_fingerprint("explain rest")
+    assert question_fingerprint("Explain\nREST") == question_fingerprint("explain rest")
+
+
+def test_operators_are_kept():
+    assert normalize_question_text("What is 2+2?") == "what is 2+2"
+    assert question_fingerprint("What is 2+2?") != question_fingerprint("What is 2*2?")
+    assert question_fingerprint("Difference between == and ===") != question_fingerprint("Difference between = and ==")
+    assert question_fingerprint("Is x<y true?") != question_fingerprint("Is x>y true?")
+
+
+def test_different_questions_differ():
+    assert question_fingerprint("What is a list?") != question_fingerprint("What is a tuple?")
+    assert question_fingerprint("") != question_fingerprint("a")
@@ -0,0 +1,153 @@
+import json
+import dataclasses
+from uuid import UUID
+from datetime import date, datetime, time
+from typing import Any, Type, TypeVar
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+from config.settings import get_settings
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Request bodies above this size are rejected before parsing (long code answers are fine)
+MAX_BODY_BYTES = get_settings().max_body_bytes
+
+
+def _default(obj: Any) -> Any:
+    """
+    Types outside plain JSON, encoded the way orjson does natively so both
+    encoders produce the same output; anything else falls back to str()
+    """
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return str(obj)
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def model_to_jsonable(model: BaseModel) -> Any:
+    """Plain JSON-compatible data for a model (UUIDs etc. as strings), pydantic v1 or v2"""
+    if hasattr(model, "model_dump"):
+        return model.model_dump(mode="json")
+    return json.loads(model.json())
+
+
+def compact(data: Any) -> Any:
+    """Drop None values recursively so compact responses stay small"""
+    if isinstance(data, dict):
+        return {k: compact(v) for k, v in data.items() if v is not None}
+    if isinstance(data, list):
+        return [compact(v) for v in data]
+    return data
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def wants_compact(request: Request) -> bool:
+    return request.query_params.get("compact", "").lower() in ("1", "true", "yes")
+
+
+def _body_errors(e: ValidationError) -> list:
+    """Pydantic errors in the shape FastAPI returns for body parameters"""
+    try:
+        errors = e.errors(include_url=False)
+    except TypeError:  # pydantic v1 has no include_url
+        errors = e.errors()
+    return [{**err, "loc": ("body", *err["loc"])} for err in errors]
+
+
+async def parse_body(request: Request, model: Type[ModelT], max_bytes: int = MAX_BODY_BYTES) -> ModelT:
+    """
+    Validate the raw request bytes straight into `model`, skipping the
+    intermediate dict FastAPI builds for body parameters. The body is read
+    in chunks and rejected with 413 as soon as it passes `max_bytes`, with
+    or without a Content-Length header.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    body = b"".join(chunks)
+
+    # Same 422 format as FastAPI's own body validation
+    if not body:
+        raise RequestValidationError(
+            [{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}],
+            body=None,
+        )
+    try:
+        if hasattr(model, "model_validate_json"):
+            return model.model_validate_json(body)
+        return model.parse_raw(body)
+    except ValidationError as e:
+        raise RequestValidationError(_body_errors(e), body=body)
+
+
+def request_body_schema(model: Type[BaseModel]) -> dict:
+    """
+    `openapi_extra` for endpoints that parse the body with parse_body, so
+    /docs still shows the model. Nested model refs are inlined because the
+    schema is not registered under components.
+    """
+    if hasattr(model, "model_json_schema"):
+        schema, defs_key, prefix = model.model_json_schema(), "$defs", "#/$defs/"
+    else:
+        schema, defs_key, prefix = model.schema(), "definitions", "#/definitions/"
+    defs = schema.pop(defs_key, {})
+
+    def inline(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith(prefix):
+                return inline(defs[ref[len(prefix):]])
+            return {k: inline(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [inline(v) for v in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": inline(schema)}}}}
+
+
+def json_response(request: Request, content: Any, status_code: int = 200) -> FastJSONResponse:
+    """
+    Build the response directly so FastAPI skips jsonable_encoder for plain
+    dict/list payloads. Only responses built here honour `?compact=1`,
+    which drops null fields from the body.
+    """
+    if wants_compact(request):
+        content = compact(content)
+    return FastJSONResponse(content, status_code=status_code)
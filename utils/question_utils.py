@@ -0,0 +1,16 @@
+import re
+import hashlib
+
+_WHITESPACE = re.compile(r"\s+")
+# Sentence punctuation around a question; operators such as + * = < > are kept
+_EDGE_PUNCTUATION = " .,;:!?"
+
+
+def normalize_question_text(text: str) -> str:
+    """Lowercase, collapse whitespace and strip surrounding punctuation so trivial edits dedupe"""
+    text = _WHITESPACE.sub(" ", (text or "").lower())
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def question_fingerprint(text: str) -> str:
+    return hashlib.sha1(normalize_question_text(text).encode("utf-8")).hexdigest()